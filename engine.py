@@ -3,12 +3,50 @@ import time
 import threading
 import signal
 import sys
+import argparse
+import numpy as np
 from sentence_transformers import SentenceTransformer
 from collector.core import LogWatcher
 from normalizer.core import LogNormalizer
-from storage import RelationalLogDB
+from receiver.core import LogReceiver, SYSLOG_PORT, JSON_PORT
+from storage import RelationalLogDB, EmbeddingCache
 
 MODEL_NAME = "all-MiniLM-L6-v2"
+BUCKET_SIZE = 32
+
+class EmbeddingService:
+    """
+    Embeds texts for every store in one coalesced encode call.
+    SentenceTransformer.encode sorts its input by length and batches it,
+    so buckets of similar length share padding; results go through the shared cache.
+    """
+    def __init__(self, model, cache, bucket_size=BUCKET_SIZE):
+        self.model = model
+        self.cache = cache
+        self.bucket_size = bucket_size
+
+    def embed(self, texts):
+        """Returns {text: vector} for `texts`, encoding only cache misses."""
+        texts = list(dict.fromkeys(texts))
+        vectors = self.cache.get_many(texts)
+        missing = [t for t in texts if t not in vectors]
+        if not missing: return vectors
+
+        vecs = self.model.encode(missing, batch_size=self.bucket_size, convert_to_numpy=True, show_progress_bar=False)
+        fresh = dict(zip(missing, np.asarray(vecs, dtype='float32')))
+
+        self.cache.put_many(fresh)
+        vectors.update(fresh)
+        return vectors
+
+    def flush(self, dbs, buffers):
+        """Coalesces new texts across all stores, embeds once, then writes each store."""
+        pending = {cat: buf for cat, buf in buffers.items() if buf}
+        if not pending: return
+        texts = [t for cat, buf in pending.items() for t in dbs[cat].new_texts(buf)]
+        vectors = self.embed(texts) if texts else {}
+        for cat, buf in pending.items():
+            dbs[cat].add_batch(self.model, buf, vectors=vectors)
 
 class Engine:
     def __init__(self):
@@ -20,6 +58,7 @@ class Engine:
             'warning': RelationalLogDB('warning'),
             'debug': RelationalLogDB('debug')
         }
+        self.embedder = EmbeddingService(self.model, EmbeddingCache(MODEL_NAME))
         self.buffers = {k: [] for k in self.dbs}
         self.last_flush = time.time()
 
@@ -35,31 +74,51 @@ class Engine:
                 cat = self._get_cat(data.get('priority', 6))
                 self.buffers[cat].append(data)
                 
-                if len(self.buffers[cat]) >= 16: self._flush(cat)
+                # A full bucket flushes every category in one coalesced pass
+                if len(self.buffers[cat]) >= 16: self._flush()
             except queue.Empty: pass
             
             if time.time() - self.last_flush > 5.0:
-                for c in self.buffers: self._flush(c)
+                self._flush()
                 self.last_flush = time.time()
 
-    def _flush(self, cat):
-        if self.buffers[cat]:
-            self.dbs[cat].add_batch(self.model, self.buffers[cat])
-            self.buffers[cat] = []
+    def _flush(self):
+        try:
+            self.embedder.flush(self.dbs, self.buffers)
+        except Exception as e:
+            # Drop the batch rather than let one bad write kill the engine thread
+            dropped = sum(len(b) for b in self.buffers.values())
+            print(f"❌ Engine: flush failed, dropped {dropped} logs: {e}", file=sys.stderr)
+        self.buffers = {k: [] for k in self.dbs}
 
     def stop(self):
         self.running = False
         for db in self.dbs.values(): db.close()
+        self.embedder.cache.close()
 
 def main():
+    parser = argparse.ArgumentParser(description="Kernolog engine")
+    parser.add_argument("--listen", metavar="ADDR", nargs="?", const="0.0.0.0", help="also accept remote logs over syslog/JSON lines (default 0.0.0.0)")
+    parser.add_argument("--syslog-port", type=int, default=SYSLOG_PORT)
+    parser.add_argument("--json-port", type=int, default=JSON_PORT)
+    parser.add_argument("--no-journal", action="store_true", help="do not watch the local journalctl")
+    args = parser.parse_args()
+
     raw_q, clean_q = queue.Queue(), queue.Queue()
     
-    collector = LogWatcher(callback=raw_q.put)
+    # Producers all feed the same raw queue
+    sources, receiver = [], None
+    if not args.no_journal: sources.append(LogWatcher(callback=raw_q.put))
+    if args.listen:
+        receiver = LogReceiver(callback=raw_q.put, host=args.listen, syslog_port=args.syslog_port,
+                               json_port=args.json_port, pending=raw_q.qsize)
+        sources.append(receiver)
+    if not sources: parser.error("nothing to index: use --listen or drop --no-journal")
+
     normalizer = LogNormalizer(input_queue=raw_q, output_queue=clean_q)
     engine = Engine()
     
-    threads = [
-        threading.Thread(target=collector.start),
+    threads = [threading.Thread(target=s.start) for s in sources] + [
         threading.Thread(target=normalizer.start),
         threading.Thread(target=engine.process, args=(clean_q,))
     ]
@@ -67,17 +126,24 @@ def main():
 
     print("\n🚀 Kernolog Engine Active. (Writes to ./gen_data)")
     
-    def shutdown(signum, frame):
+    def stop_all(code=0):
         print("\nStopping Engine...")
-        collector.stop()
+        for s in sources: s.stop()
         normalizer.stop()
         engine.stop()
-        sys.exit(0)
+        sys.exit(code)
+
+    def shutdown(signum, frame): stop_all()
 
     signal.signal(signal.SIGINT, shutdown)
     signal.signal(signal.SIGTERM, shutdown)
     
-    while True: time.sleep(1)
+    while True:
+        time.sleep(1)
+        # A receiver that cannot bind would leave the engine silently deaf
+        if receiver and receiver.error:
+            print(f"❌ Network receiver failed: {receiver.error}", file=sys.stderr)
+            stop_all(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -36,14 +36,17 @@ class LogNormalizer:
     def _worker(self):
         while self.running:
             try:
-                # Get the Dict from the queue
+                # Get the Dict (or a list of Dicts from a network receiver) from the queue
                 log_data = self.input_queue.get(timeout=1)
-                self.process_log(log_data)
-                self.input_queue.task_done()
             except queue.Empty:
                 continue
-            except Exception as e:
-                logger.error(f"Error processing log: {e}")
+
+            for item in (log_data if isinstance(log_data, list) else [log_data]):
+                try:
+                    self.process_log(item)
+                except Exception as e:
+                    logger.error(f"Error processing log: {e}")
+            self.input_queue.task_done()
 
     def _extract_params(self, template, raw_msg):
         """
@@ -80,6 +83,8 @@ class LogNormalizer:
         raw_msg = str(log_data["message"]).strip()
         priority = log_data.get("priority", 6)
         unit = log_data.get("unit", "sys")
+        host = log_data.get("host")  # Only set for logs from remote hosts
+        source = f"{host}/{unit}" if host else unit
 
         if not raw_msg: return
 
@@ -112,11 +117,11 @@ class LogNormalizer:
             self.printed_clusters.add(cluster_id)
             if is_new_template:
                 print(f"{Style.DIM}🆕 [NEW TEMPLATE #{cluster_id}] {template}{Style.RESET_ALL}")
-            print(f"{color}{icon} [{label:<5}] {unit}: {raw_msg[:100]}{Style.RESET_ALL}")
+            print(f"{color}{icon} [{label:<5}] {source}: {raw_msg[:100]}{Style.RESET_ALL}")
             
-            # Desktop Alert
-            if priority <= 3:
-                self.trigger_alert(f"{unit}: {raw_msg}")
+            # Desktop Alert (local logs only; a fleet's errors would spawn a process each)
+            if priority <= 3 and not host:
+                self.trigger_alert(f"{source}: {raw_msg}")
 
         # 5. PUSH TO PIPELINE (Critical Step)
         if self.output_queue:
@@ -125,7 +130,8 @@ class LogNormalizer:
                 'params': params,      # The extracted variables (['Bob'])
                 'priority': priority,
                 'original': raw_msg,
-                'unit': unit
+                'unit': unit,
+                'host': host
             }
             self.output_queue.put(processed_data)
 
@@ -0,0 +1,32 @@
+import sys
+import logging
+from .core import LogReceiver, parse_syslog, parse_json
+
+__all__ = ["LogReceiver", "parse_syslog", "parse_json", "listen"]
+
+# Basic logging config so users see output immediately
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+
+def _batch_printer(batch):
+    """Default callback: prints each received record to stdout."""
+    for log in batch:
+        sys.stdout.write(f"[{log['host']}] {log['priority']} {log['unit']}: {log['message']}\n")
+    sys.stdout.flush()
+
+def listen(custom_callback=None, **kwargs):
+    """
+    Starts the network receiver. Blocks until the script is stopped.
+
+    Args:
+        custom_callback (func): A function that takes a list of record dicts.
+        **kwargs: Passed to LogReceiver (host, syslog_port, json_port, ...).
+    """
+    receiver = LogReceiver(callback=custom_callback or _batch_printer, **kwargs)
+    try:
+        receiver.start()
+    except KeyboardInterrupt:
+        receiver.stop()
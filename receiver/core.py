@@ -0,0 +1,225 @@
+import re
+import json
+import socket
+import asyncio
+import logging
+
+logger = logging.getLogger("LogReceiver")
+
+SYSLOG_PORT = 5514   # UDP + TCP, unprivileged stand-in for 514
+JSON_PORT = 5515     # TCP, newline-delimited JSON records
+BATCH_SIZE = 512     # Records per hand-off to the raw queue
+MAX_PENDING = 64     # Queued batches at which TCP readers stop reading
+READ_SIZE = 64 * 1024
+MAX_FRAME = 64 * 1024   # Longest accepted message; bigger frames close the connection
+UDP_FLUSH_DELAY = 0.01  # Seconds to coalesce datagrams into one batch
+UDP_RCVBUF = 4 * 1024 * 1024
+
+# <PRI>1 TIMESTAMP HOSTNAME APP-NAME PROCID MSGID [SD] MSG
+RFC5424 = re.compile(r'<(\d{1,3})>1 \S+ (\S+) (\S+) \S+ \S+ (?:-|(?:\[(?:[^\]\\]|\\.)*\])+) ?(.*)', re.S)
+# <PRI>Mmm dd hh:mm:ss HOSTNAME TAG[pid]: MSG  (timestamp and hostname are often missing)
+# HOSTNAME is only looked for after a TIMESTAMP; otherwise the first word belongs to MSG.
+RFC3164 = re.compile(r'<(\d{1,3})>(?:[A-Z][a-z]{2} [ \d]\d \d\d:\d\d:\d\d (?:([^\s:]+) )?)?(?:([^\s:\[]+)(?:\[\d+\])?: )?(.*)', re.S)
+
+def parse_syslog(line, peer):
+    """
+    Parses one RFC 5424 or RFC 3164 message into the collector's record shape.
+    Returns None for lines that are not syslog.
+    """
+    if isinstance(line, bytes): line = line.decode("utf-8", "replace")
+    line = line.rstrip("\r\n\x00")
+
+    m = RFC5424.match(line)
+    if m:
+        pri, host, unit, msg = m.groups()
+        msg = msg.lstrip("\ufeff")  # RFC 5424 allows a UTF-8 BOM before MSG
+    else:
+        m = RFC3164.match(line)
+        if not m: return None
+        pri, host, unit, msg = m.groups()
+
+    return {
+        "message": msg,
+        "priority": int(pri) & 7,  # Severity is the low 3 bits of PRI
+        "unit": unit if unit and unit != "-" else "system",
+        "host": host if host and host != "-" else peer
+    }
+
+def parse_json(line, peer):
+    """
+    Parses one JSON line. Accepts the collector's record shape
+    ({"message", "priority", "unit"}) or raw journalctl JSON.
+    """
+    try:
+        entry = json.loads(line)
+        if not isinstance(entry, dict): return None
+        return {
+            # Missing and null fields both fall back, like the collector's defaults
+            "message": entry.get("message") or entry.get("MESSAGE") or "",
+            "priority": int(_first(entry.get("priority"), entry.get("PRIORITY"), 6)),
+            "unit": entry.get("unit") or entry.get("_SYSTEMD_UNIT") or "system",
+            "host": entry.get("host") or entry.get("_HOSTNAME") or peer
+        }
+    except (ValueError, TypeError):
+        return None
+
+def _first(*values):
+    """First value that is not None (0 is a valid priority)."""
+    return next(v for v in values if v is not None)
+
+def _split_syslog(buf):
+    """
+    Splits a TCP syslog stream into frames (RFC 6587).
+    Handles both octet-counting ("LEN <PRI>...") and newline framing.
+    Returns (frames, leftover bytes); raises ValueError on oversized frames.
+    """
+    frames, pos, n = [], 0, len(buf)
+    while pos < n:
+        if buf[pos:pos + 1].isdigit():
+            sp = buf.find(b" ", pos, pos + 12)
+            if sp == -1:
+                if n - pos >= 12: raise ValueError("malformed octet count")
+                break
+            length = int(buf[pos:sp])
+            if length > MAX_FRAME: raise ValueError(f"frame of {length} bytes exceeds {MAX_FRAME}")
+            end = sp + 1 + length
+            if end > n: break
+            frames.append(buf[sp + 1:end])
+            pos = end
+        else:
+            nl = buf.find(b"\n", pos)
+            if nl == -1: break
+            frames.append(buf[pos:nl])
+            pos = nl + 1
+    return frames, _check_leftover(buf[pos:])
+
+def _split_lines(buf):
+    frames = buf.split(b"\n")
+    return frames[:-1], _check_leftover(frames[-1])
+
+def _check_leftover(rest):
+    # Bounds the per-connection buffer, and with it the cost of `buf + chunk`.
+    # The slack covers a pending octet-counted frame's "LEN " header.
+    if len(rest) > MAX_FRAME + 12: raise ValueError(f"unterminated frame exceeds {MAX_FRAME} bytes")
+    return rest
+
+class _SyslogDatagram(asyncio.DatagramProtocol):
+    """UDP syslog: one message per datagram, flushed in short time windows."""
+    def __init__(self, receiver):
+        self.receiver = receiver
+        self.batch = []
+        self.scheduled = None
+
+    def connection_made(self, transport):
+        # A larger kernel buffer absorbs bursts while the loop is busy parsing
+        sock = transport.get_extra_info("socket")
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RCVBUF)
+        except OSError:
+            pass
+
+    def datagram_received(self, data, addr):
+        # UDP has no flow control; shed load instead of growing the queue
+        if self.receiver._is_full():
+            self.receiver.dropped += 1
+            return
+        record = parse_syslog(data, addr[0])
+        if record: self.batch.append(record)
+        if len(self.batch) >= self.receiver.batch_size: self._flush()
+        elif not self.scheduled:
+            self.scheduled = asyncio.get_running_loop().call_later(UDP_FLUSH_DELAY, self._flush)
+
+    def _flush(self):
+        if self.scheduled:
+            self.scheduled.cancel()
+            self.scheduled = None
+        if self.batch:
+            self.receiver._dispatch(self.batch)
+            self.batch = []
+
+class LogReceiver:
+    """
+    asyncio network source for remote hosts.
+    Accepts syslog over UDP/TCP and JSON lines over TCP, and hands lists of
+    record dicts (tagged with 'host') to `callback`, e.g. the raw queue's put.
+    """
+    def __init__(self, callback, host="0.0.0.0", syslog_port=SYSLOG_PORT, json_port=JSON_PORT,
+                 pending=None, max_pending=MAX_PENDING, batch_size=BATCH_SIZE):
+        self.callback = callback
+        self.host = host
+        self.syslog_port = syslog_port
+        self.json_port = json_port
+        self.pending = pending  # Callable returning queue depth, e.g. raw_q.qsize
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.running = True
+        self.loop = None
+        self._stopped = None
+        self.error = None  # Set if the servers could not start
+        self.received = 0
+        self.dropped = 0
+
+    def start(self):
+        """Runs the servers until stop() is called. Blocks like LogWatcher.start()."""
+        try:
+            asyncio.run(self._serve())
+        except OSError as e:
+            self.error = e
+            self.running = False
+            logger.critical(f"Receiver could not bind: {e}")
+        logger.info(f"Receiver shutdown complete. Received {self.received}, dropped {self.dropped}.")
+
+    def stop(self, signum=None, frame=None):
+        logger.info("Stopping receiver...")
+        self.running = False
+        loop, stopped = self.loop, self._stopped
+        if loop and stopped and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(stopped.set)
+            except RuntimeError:
+                pass  # Loop closed between the check and the call
+
+    async def _serve(self):
+        self.loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        servers = []
+        try:
+            if not self.running: return
+
+            udp, _ = await self.loop.create_datagram_endpoint(lambda: _SyslogDatagram(self), local_addr=(self.host, self.syslog_port))
+            servers.append(udp)
+            servers.append(await asyncio.start_server(lambda r, w: self._handle(r, w, _split_syslog, parse_syslog), self.host, self.syslog_port))
+            servers.append(await asyncio.start_server(lambda r, w: self._handle(r, w, _split_lines, parse_json), self.host, self.json_port))
+            logger.info(f"Receiver listening on {self.host}: syslog udp/tcp {self.syslog_port}, json tcp {self.json_port}")
+
+            await self._stopped.wait()
+        finally:
+            for s in servers: s.close()
+            self.loop, self._stopped = None, None
+
+    async def _handle(self, reader, writer, split, parse):
+        peer = (writer.get_extra_info("peername") or ("unknown",))[0]
+        buf = b""
+        try:
+            while self.running:
+                # Per-connection backpressure: while the queue is full we stop
+                # reading, the socket buffer fills and TCP slows the sender.
+                while self._is_full() and self.running:
+                    await asyncio.sleep(0.01)
+
+                chunk = await reader.read(READ_SIZE)
+                if not chunk: break
+                frames, buf = split(buf + chunk)
+                if frames: self._dispatch([r for r in (parse(f, peer) for f in frames) if r])
+        except (ConnectionError, ValueError) as e:
+            logger.warning(f"Dropping connection from {peer}: {e}")
+        finally:
+            writer.close()
+
+    def _is_full(self):
+        return self.pending is not None and self.pending() >= self.max_pending
+
+    def _dispatch(self, records):
+        self.received += len(records)
+        for i in range(0, len(records), self.batch_size):
+            self.callback(records[i:i + self.batch_size])
@@ -0,0 +1,73 @@
+"""
+Local load generator for the network receiver.
+
+    python -m receiver.loadgen --proto udp --count 200000
+    python -m receiver.loadgen --proto tcp --rate 20000
+    python -m receiver.loadgen --proto json
+"""
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+from .core import SYSLOG_PORT, JSON_PORT
+
+UNITS = ["kernel", "sshd", "systemd", "NetworkManager", "dockerd"]
+TEMPLATES = [
+    "usb {0}-{1}: new high-speed USB device number {1}",
+    "Accepted publickey for user{0} from 10.0.{0}.{1} port 22",
+    "Out of memory: Killed process {0} (worker-{1})",
+    "EXT4-fs error (device sda{1}): inode {0} bad checksum",
+    "eth{1}: link down",
+]
+
+def make_message(i, proto):
+    unit = UNITS[i % len(UNITS)]
+    msg = TEMPLATES[i % len(TEMPLATES)].format(random.randint(1, 9999), i % 8)
+    pri = 8 + random.choice([2, 3, 4, 6, 7])  # facility user, mixed severities
+    host = f"node{i % 16:02d}"
+    if proto == "json":
+        return json.dumps({"message": msg, "priority": pri & 7, "unit": unit, "host": host})
+    if i % 2:
+        return f"<{pri}>1 2024-01-01T00:00:00.000Z {host} {unit} {i} - - {msg}"
+    return f"<{pri}>{time.strftime('%b %d %H:%M:%S')} {host} {unit}[{i}]: {msg}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Kernolog receiver load generator")
+    parser.add_argument("--proto", choices=["udp", "tcp", "json"], default="udp")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="defaults to the receiver's port for --proto")
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--rate", type=int, default=0, help="messages per second, 0 for as fast as possible")
+    args = parser.parse_args()
+
+    port = args.port or (JSON_PORT if args.proto == "json" else SYSLOG_PORT)
+    if args.proto == "udp":
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        send = lambda data: sock.sendto(data, (args.host, port))
+    else:
+        sock = socket.create_connection((args.host, port))
+        send = sock.sendall
+
+    start = time.time()
+    chunk = []
+    for i in range(args.count):
+        data = (make_message(i, args.proto) + "\n").encode()
+        if args.proto == "udp": send(data)
+        else:
+            chunk.append(data)
+            if len(chunk) >= 256:
+                send(b"".join(chunk))
+                chunk = []
+        if args.rate:
+            ahead = (i + 1) / args.rate - (time.time() - start)
+            if ahead > 0: time.sleep(ahead)
+    if chunk: send(b"".join(chunk))
+    sock.close()
+
+    elapsed = time.time() - start
+    sys.stdout.write(f"Sent {args.count} {args.proto} messages in {elapsed:.2f}s ({args.count / elapsed:,.0f} msg/s)\n")
+
+if __name__ == "__main__":
+    main()
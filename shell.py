@@ -1,18 +1,88 @@
 import sys
+import json
+import argparse
 from sentence_transformers import SentenceTransformer
 from storage import RelationalLogDB
 
+# Words that trigger Time-Sorting
+TIME_KEYWORDS = ['now', 'latest', 'recent', 'current', 'last', 'today']
+# Stand-in query when the user only asked for "latest"/"now"
+RECENCY_QUERY = "system device error warning"
+
+def parse_query(query):
+    """Returns (search_text, recency) with time keywords stripped from the text."""
+    recency = any(w in query.lower() for w in TIME_KEYWORDS)
+    search_text = query
+    if recency:
+        for w in TIME_KEYWORDS:
+            search_text = search_text.replace(w, "").strip()
+    return search_text, recency
+
+def run_batch(lines, model, dbs, out=sys.stdout):
+    """
+    Runs many '<category> <query>' lines at once and writes one JSON object per line.
+    All queries are encoded in a single call and each category is scanned once.
+    """
+    jobs, vectors_needed = [], []
+    # Output follows input order, malformed lines included
+    emitted = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"): continue
+        parts = line.split(" ", 2)
+        if parts[0].lower() == "search": parts = parts[1:]
+        if len(parts) < 2 or parts[0].lower() not in dbs:
+            emitted.append({"query": line, "error": "expected '<category> <query>'"})
+            continue
+
+        cat, query = parts[0].lower(), " ".join(parts[1:])
+        search_text, recency = parse_query(query)
+        pure_recency = recency and not search_text
+        jobs.append({"category": cat, "query": query, "recency": recency, "k": 10 if pure_recency else 5})
+        emitted.append(jobs[-1])
+        vectors_needed.append(RECENCY_QUERY if pure_recency else search_text)
+
+    vecs = model.encode(vectors_needed, convert_to_numpy=True, show_progress_bar=False) if jobs else None
+
+    by_cat = {}
+    for i, job in enumerate(jobs): by_cat.setdefault(job["category"], []).append(i)
+
+    for cat, idxs in by_cat.items():
+        results = dbs[cat].search_many(vecs[idxs], model=model, k=max(jobs[i]["k"] for i in idxs), recency_bias=[jobs[i]["recency"] for i in idxs])
+        for pos, i in enumerate(idxs):
+            hits = results[pos][:jobs[i]["k"]] if results else []
+            jobs[i]["results"] = [{"score": round(h['final_score'], 4), "timestamp": h['ts'], "host": h['host'], "text": h['full_text']} for h in hits]
+
+    for job in emitted:
+        if "error" not in job: job = {"category": job["category"], "query": job["query"], "results": job["results"]}
+        out.write(json.dumps(job) + "\n")
+    out.flush()
+
+def _read_batch(path):
+    if path == "-": return sys.stdin.readlines()
+    with open(path) as f: return f.readlines()
+
 def main():
-    print("⏳ Loading Search Shell...")
+    parser = argparse.ArgumentParser(description="Kernolog search shell")
+    parser.add_argument("--batch", metavar="FILE", help="run '<category> <query>' lines from FILE ('-' for stdin) and print JSON lines")
+    args = parser.parse_args()
+
+    # Keep stdout clean for JSON lines in batch mode
+    log = sys.stderr if args.batch else sys.stdout
+    print("⏳ Loading Search Shell...", file=log)
     model = SentenceTransformer("all-MiniLM-L6-v2")
     dbs = {k: RelationalLogDB(k, mode='reader') for k in ['error', 'warning', 'debug']}
-    
-    # Words that trigger Time-Sorting
-    TIME_KEYWORDS = ['now', 'latest', 'recent', 'current', 'last', 'today']
+
+    if args.batch:
+        try: run_batch(_read_batch(args.batch), model, dbs)
+        finally:
+            for db in dbs.values(): db.close()
+        return
 
     print("\n" + "="*60)
     print("   KERNOLOG SEARCH SHELL")
     print("   Type: search <category> <query>")
+    print("   Batch: batch <file>  (one '<category> <query>' per line, JSON output)")
     print("   Tip: Use 'now' or 'latest' to see what just happened.")
     print("="*60 + "\n")
 
@@ -38,18 +108,13 @@ def main():
                 cat, query = parts[1].lower(), parts[2]
                 
                 if cat in dbs:
-                    recency = any(w in query.lower() for w in TIME_KEYWORDS)
-                    
                     # 1. Clean Query
-                    search_text = query
-                    if recency:
-                        for w in TIME_KEYWORDS:
-                            search_text = search_text.replace(w, "").strip()
+                    search_text, recency = parse_query(query)
                     
                     # 2. Handle "Pure Recency" (User typed only "latest" or "now")
                     if recency and not search_text:
                         print(f"\n\033[1;33m--- {cat.upper()} LATEST LOGS ---\033[0m")
-                        vec = model.encode(["system device error warning"], convert_to_numpy=True, show_progress_bar=False)
+                        vec = model.encode([RECENCY_QUERY], convert_to_numpy=True, show_progress_bar=False)
                         # Pass model here too!
                         res = dbs[cat].search(vec, model=model, k=10, recency_bias=True)
                         if not res: print("No logs found.")
@@ -72,6 +137,12 @@ def main():
                     for r in res: print(r)
                     print("-" * 50)
                 else: print(f"Unknown category '{cat}'.")
+            elif cmd == "batch":
+                if len(parts) < 2:
+                    print("Usage: batch <file>")
+                    continue
+                try: run_batch(_read_batch(" ".join(parts[1:])), model, dbs)
+                except (OSError, UnicodeDecodeError) as e: print(f"Cannot read batch file: {e}")
             elif cmd == "clear": print("\033c", end="")
             else: print("Unknown command.")
             
@@ -1,11 +1,54 @@
 import os
 import time
 import sqlite3
+import hashlib
 import numpy as np
 
 # Configuration
 DB_PATH = "gen_data"
 EMBED_DIM = 384
+SQL_VAR_LIMIT = 500  # Stay well under SQLite's bound-parameter limit
+
+class EmbeddingCache:
+    """
+    Installation-wide text-hash -> vector cache.
+    Shared by every category so a template is only ever embedded once.
+    Keys include `model_name`, so switching models never serves stale vectors.
+    """
+    def __init__(self, model_name, name="embeddings"):
+        self.model_name = model_name
+        self.dim = EMBED_DIM
+        os.makedirs(DB_PATH, exist_ok=True)
+        self.sql_file = os.path.join(DB_PATH, f"{name}.sqlite")
+
+        self.conn = sqlite3.connect(self.sql_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL;")
+        with self.conn:
+            self.conn.execute('CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, vector BLOB)')
+
+    def _key(self, text):
+        return hashlib.sha1(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts):
+        """Returns {text: vector} for every text already in the cache."""
+        keys = {self._key(t): t for t in texts}
+        hashes = list(keys)
+        found = {}
+        for i in range(0, len(hashes), SQL_VAR_LIMIT):
+            chunk = hashes[i:i + SQL_VAR_LIMIT]
+            marks = ",".join("?" * len(chunk))
+            for h, blob in self.conn.execute(f"SELECT hash, vector FROM embeddings WHERE hash IN ({marks})", chunk):
+                vec = np.frombuffer(blob, dtype='float32')
+                if vec.size == self.dim: found[keys[h]] = vec
+        return found
+
+    def put_many(self, vectors):
+        """Stores a {text: vector} mapping."""
+        rows = [(self._key(t), np.asarray(v, dtype='float32').tobytes()) for t, v in vectors.items()]
+        with self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO embeddings (hash, vector) VALUES (?, ?)", rows)
+
+    def close(self): self.conn.close()
 
 class RelationalLogDB:
     def __init__(self, name, mode='writer'):
@@ -24,6 +67,8 @@ class RelationalLogDB:
             self._init_schema()
             self.template_cache = {}
             self._load_cache()
+        else:
+            self._migrate()
 
         self.vec_count = 0
         if os.path.exists(self.vec_file):
@@ -32,15 +77,36 @@ class RelationalLogDB:
     def _init_schema(self):
         with self.conn:
             self.conn.execute('CREATE TABLE IF NOT EXISTS templates (id INTEGER PRIMARY KEY, text TEXT UNIQUE, vector_idx INTEGER, first_seen REAL, last_seen REAL, count INTEGER DEFAULT 1)')
-            self.conn.execute('CREATE TABLE IF NOT EXISTS occurrences (id INTEGER PRIMARY KEY, template_id INTEGER, timestamp REAL, priority INT, FOREIGN KEY(template_id) REFERENCES templates(id))')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS occurrences (id INTEGER PRIMARY KEY, template_id INTEGER, timestamp REAL, priority INT, host TEXT, FOREIGN KEY(template_id) REFERENCES templates(id))')
             self.conn.execute('CREATE TABLE IF NOT EXISTS parameters (id INTEGER PRIMARY KEY, occurrence_id INTEGER, position INTEGER, value TEXT, FOREIGN KEY(occurrence_id) REFERENCES occurrences(id))')
             self.conn.execute('CREATE INDEX IF NOT EXISTS idx_template_text ON templates(text)')
+        self._migrate()
+
+    def _migrate(self):
+        # Stores created before remote ingestion lack occurrences.host
+        cols = [r[1] for r in self.conn.execute("PRAGMA table_info(occurrences)")]
+        if cols and 'host' not in cols:
+            with self.conn: self.conn.execute("ALTER TABLE occurrences ADD COLUMN host TEXT")
 
     def _load_cache(self):
         cursor = self.conn.execute("SELECT id, text, vector_idx FROM templates")
         self.template_cache = {row[1]: (row[0], row[2]) for row in cursor}
+        # Occurrence ids come from a per-store counter, independent of timestamps
+        self.next_oid = (self.conn.execute("SELECT MAX(id) FROM occurrences").fetchone()[0] or 0) + 1
 
-    def add_batch(self, model, batch_data):
+    def new_texts(self, batch_data):
+        """Unique template texts in `batch_data` that this store has not vectorised yet."""
+        texts = []
+        for item in batch_data:
+            text = item['message']
+            if text not in self.template_cache and text not in texts: texts.append(text)
+        return texts
+
+    def add_batch(self, model, batch_data, vectors=None):
+        """
+        `vectors` is an optional {text: vector} map of precomputed embeddings
+        (see engine.EmbeddingService); `model` is only used for texts missing from it.
+        """
         base_time = time.time()
         unique_texts, updates, occ_insert, param_insert, batch_map = [], [], [], [], []
         
@@ -58,7 +124,11 @@ class RelationalLogDB:
                 batch_map.append((i, text))
 
         if unique_texts:
-            vecs = model.encode(unique_texts, convert_to_numpy=True)
+            vectors = dict(vectors or {})
+            missing = [t for t in unique_texts if t not in vectors]
+            if missing:
+                for t, v in zip(missing, model.encode(missing, convert_to_numpy=True, show_progress_bar=False)): vectors[t] = v
+            vecs = np.stack([vectors[t] for t in unique_texts]).astype('float32')
             with open(self.vec_file, "ab") as f: f.write(vecs.tobytes())
             
             start_idx = self.vec_count
@@ -75,12 +145,13 @@ class RelationalLogDB:
 
         with self.conn:
             if updates: self.conn.executemany("UPDATE templates SET last_seen=?, count=count+1 WHERE id=?", updates)
-            if occ_insert: self.conn.executemany("INSERT INTO occurrences (id, template_id, timestamp, priority) VALUES (?,?,?,?)", occ_insert)
+            if occ_insert: self.conn.executemany("INSERT INTO occurrences (id, template_id, timestamp, priority, host) VALUES (?,?,?,?,?)", occ_insert)
             if param_insert: self.conn.executemany("INSERT INTO parameters (occurrence_id, position, value) VALUES (?,?,?)", param_insert)
 
     def _prepare_occ(self, tid, item, occ_list, param_list, timestamp):
-        oid = int(timestamp*1000000) 
-        occ_list.append((oid, tid, timestamp, item.get('priority',6)))
+        oid = self.next_oid
+        self.next_oid += 1
+        occ_list.append((oid, tid, timestamp, item.get('priority',6), item.get('host')))
         for i, p in enumerate(item.get('params',[])): param_list.append((oid, i, str(p)))
 
     def search(self, query_vector, model, k=5, recency_bias=False):
@@ -88,75 +159,107 @@ class RelationalLogDB:
         Updated Search with Live Re-Ranking.
         Requires passing the `model` instance to encode full sentences on the fly.
         """
+        results = self.search_many(query_vector, model, k=k, recency_bias=recency_bias)
+        if results is None: return ["No logs indexed yet."]
+
+        output = []
+        for item in results[0]:
+            dt = time.localtime(item['ts'])
+            millis = int((item['ts'] % 1) * 1000)
+            t_str = f"{time.strftime('%H:%M:%S', dt)}.{millis:03d}"
+            source = f"{item['host']}: " if item['host'] else ""
+            output.append(f"[Score:{item['final_score']:.2f}] {t_str} | {source}{item['display_text']}")
+        return output
+
+    def search_many(self, query_vectors, model, k=5, recency_bias=False):
+        """
+        Batch version of search(): one GEMM over the memmap scores every query,
+        the union of candidates is hydrated and re-encoded once, then each
+        query is re-ranked on its own candidates.
+        `recency_bias` is a bool or one bool per query.
+        Returns one list of result dicts per query, or None if the store is empty.
+        """
         if os.path.exists(self.vec_file): self.vec_count = os.path.getsize(self.vec_file) // (self.dim * 4)
-        if self.vec_count == 0: return ["No logs indexed yet."]
-        
-        # 1. Broad Phase: Get top 20 candidates based on Template Structure
+        if self.vec_count == 0: return None
+
+        queries = np.asarray(query_vectors, dtype='float32').reshape(-1, self.dim)
+        if isinstance(recency_bias, bool): recency_bias = [recency_bias] * len(queries)
+
+        # 1. Broad Phase: top 20 templates per query from a single (N x Q) product
         search_k = min(20, self.vec_count)
-        
+
         mm = np.memmap(self.vec_file, dtype='float32', mode='r', shape=(self.vec_count, self.dim))
-        scores = np.dot(mm, query_vector.T).flatten()
-        top_indices = np.argpartition(scores, -search_k)[-search_k:]
-        
-        raw_candidates = []
-        for idx in top_indices:
-            row = self.conn.execute("SELECT id, text, count, last_seen FROM templates WHERE vector_idx=?", (int(idx),)).fetchone()
-            if row:
-                # Fetch the LATEST occurrence with its parameters
-                occ_row = self.conn.execute("SELECT id, timestamp FROM occurrences WHERE template_id=? ORDER BY timestamp DESC LIMIT 1", (row[0],)).fetchone()
-                
-                full_text = row[1]
-                ts = row[3]
-                
-                if occ_row:
-                    ts = occ_row[1]
-                    params = [r[0] for r in self.conn.execute("SELECT value FROM parameters WHERE occurrence_id=? ORDER BY position", (occ_row[0],))]
-                    
-                    # Construct the REAL sentence (Hydrate)
-                    # We use this for re-ranking so the model sees "SanDisk"
-                    temp_text = full_text
-                    for p in params:
-                        if "<*>" in temp_text: temp_text = temp_text.replace("<*>", str(p), 1)
-                        else: temp_text += f" {p}"
-                    full_text = temp_text
-                
-                raw_candidates.append({
-                    'template_score': float(scores[idx]),
-                    'ts': ts,
-                    'full_text': full_text, # This now contains "SanDisk" or "Skullcandy"
-                    'display_text': self._highlight_params(row[1], params if occ_row else [])
-                })
-        
-        # 2. Narrow Phase: Live Re-Ranking
-        # We encode the FULL texts (with params) and check against the query again
-        if raw_candidates:
-            texts_to_rank = [c['full_text'] for c in raw_candidates]
-            
-            # This is fast because we only encode ~20 sentences
-            new_vecs = model.encode(texts_to_rank, convert_to_numpy=True, show_progress_bar=False)
-            new_scores = np.dot(new_vecs, query_vector.T).flatten()
-            
-            for i, c in enumerate(raw_candidates):
-                c['final_score'] = float(new_scores[i])
+        scores = np.dot(mm, queries.T)
+        top_indices = np.argpartition(scores, -search_k, axis=0)[-search_k:]
+        del mm
+
+        # Hydrate each distinct template once, however many queries picked it
+        candidates = {}
+        for idx in np.unique(top_indices):
+            cand = self._hydrate(int(idx))
+            if cand: candidates[int(idx)] = cand
+
+        # 2. Narrow Phase: encode the union of full sentences once, score against every query
+        rank_idx = {}
+        if candidates:
+            order = list(candidates)
+            rank_idx = {idx: i for i, idx in enumerate(order)}
+            new_vecs = model.encode([candidates[i]['full_text'] for i in order], convert_to_numpy=True, show_progress_bar=False)
+            new_scores = np.dot(new_vecs, queries.T)
+
+        results = []
+        for q in range(len(queries)):
+            ranked = []
+            for idx in top_indices[:, q]:
+                idx = int(idx)
+                if idx not in candidates: continue
+                c = dict(candidates[idx])
+                c['template_score'] = float(scores[idx, q])
+                c['final_score'] = float(new_scores[rank_idx[idx], q])
+                ranked.append(c)
 
             # 3. Sort
-            if recency_bias:
+            if recency_bias[q]:
                 # If user wants "Latest", sort by time, but filter out low relevance (< 0.2)
-                raw_candidates = [c for c in raw_candidates if c['final_score'] > 0.15]
-                raw_candidates.sort(key=lambda x: x['ts'], reverse=True)
+                ranked = [c for c in ranked if c['final_score'] > 0.15]
+                ranked.sort(key=lambda x: x['ts'], reverse=True)
             else:
                 # Otherwise sort by the new Smart Score
-                raw_candidates.sort(key=lambda x: x['final_score'], reverse=True)
+                ranked.sort(key=lambda x: x['final_score'], reverse=True)
+            results.append(ranked[:k])
 
-        output = []
-        for item in raw_candidates[:k]:
-            dt = time.localtime(item['ts'])
-            millis = int((item['ts'] % 1) * 1000)
-            t_str = f"{time.strftime('%H:%M:%S', dt)}.{millis:03d}"
-            output.append(f"[Score:{item['final_score']:.2f}] {t_str} | {item['display_text']}")
-        
-        del mm
-        return output
+        return results
+
+    def _hydrate(self, vector_idx):
+        row = self.conn.execute("SELECT id, text, count, last_seen FROM templates WHERE vector_idx=?", (vector_idx,)).fetchone()
+        if not row: return None
+
+        # Fetch the LATEST occurrence with its parameters
+        occ_row = self.conn.execute("SELECT id, timestamp, host FROM occurrences WHERE template_id=? ORDER BY timestamp DESC LIMIT 1", (row[0],)).fetchone()
+
+        full_text = row[1]
+        ts = row[3]
+        host = None
+        params = []
+
+        if occ_row:
+            ts, host = occ_row[1], occ_row[2]
+            params = [r[0] for r in self.conn.execute("SELECT value FROM parameters WHERE occurrence_id=? ORDER BY position", (occ_row[0],))]
+
+            # Construct the REAL sentence (Hydrate)
+            # We use this for re-ranking so the model sees "SanDisk"
+            temp_text = full_text
+            for p in params:
+                if "<*>" in temp_text: temp_text = temp_text.replace("<*>", str(p), 1)
+                else: temp_text += f" {p}"
+            full_text = temp_text
+
+        return {
+            'ts': ts,
+            'host': host,  # None for local journalctl logs
+            'full_text': full_text, # This now contains "SanDisk" or "Skullcandy"
+            'display_text': self._highlight_params(row[1], params)
+        }
 
     def _highlight_params(self, text, params):
         for p in params: